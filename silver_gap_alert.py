@@ -1,7 +1,13 @@
+import asyncio
+import codecs
+import hashlib
+import json
 import os
 import re
-import requests
-import yfinance as yf
+import time
+import aiohttp
+import orjson
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
 
 # ---------------- CONFIG ----------------
@@ -12,103 +18,283 @@ THRESHOLD_ETF = 5.0        # condition-1: abs(A-B) > 5
 MAX_DIFF_TO_MCX = 15.0     # condition-2: abs(A - MCX_per_gram) < 30
 
 GROWW_MCX_URL = "https://groww.in/commodities/futures/mcx_silvermic"
+# Main price near the "Silver Micro" header (bounded to avoid runaway backtracking)
+_GROWW_RE = re.compile(r"Silver Micro.{0,4096}?₹\s*([\d,]+(?:\.\d+)?)", re.DOTALL | re.IGNORECASE)
+# Fallback: price element in the DOM, then the first ₹ amount in its text
+GROWW_PRICE_SELECTORS = ('[data-testid="price"]', "h2")
+_RUPEE_RE = re.compile(r"₹\s*([\d,]+(?:\.\d+)?)")
+_NUMBER_CHARS = frozenset("0123456789,.")
+_DELETE_COMMAS = str.maketrans("", "", ",₹ ")  # "₹2,46,100.00" -> "246100.00"
+SCRAPE_CHUNK_SIZE = 16 * 1024
+SCRAPE_MAX_CHARS = 256 * 1024  # price sits near the top; never buffer more than this
 # Benchmark inputs (machine-readable, no JS scraping)
 SILVER_FUTURES = "SI=F"   # Silver futures (USD per troy ounce)
 USDINR = "USDINR=X"       # USD/INR FX rate
 
+YAHOO_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0"}
+# Yahoo/Telegram answer in well under a second; tight phase timeouts keep a stuck socket from eating the run
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=2, sock_connect=2, sock_read=4)
+SCRAPE_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=2, sock_connect=2, sock_read=4)
+
+# Opt-in disk cache for quotes, so back-to-back local runs skip the Yahoo round-trip.
+# Off by default: CI starts from a fresh checkout every 15 min and would never get a hit.
+QUOTE_CACHE = bool(os.environ.get("SILVER_QUOTE_CACHE"))
+QUOTE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "quotes")
+QUOTE_TTL_SEC = 60
+
+# Thresholds are baked in once; the rest is filled per alert via format_map
+_ALERT_TMPL = (
+    "🚨 Silver Alert\n\n"
+    "GROWWSLVR: {a:.2f}\n"
+    "SILVERIETF: {b:.2f}\n"
+    f"ETF Gap (A-B): {{diff_etf:.2f}} (>|{THRESHOLD_ETF}|)\n\n"
+    "MCX SILVERMIC (₹/kg): {mcx_per_kg:.0f}\n"
+    "MCX (₹/g): {mcx_per_gram:.2f}\n"
+    f"A - MCX Gap: {{diff_to_mcx:.2f}} (<|{MAX_DIFF_TO_MCX}|)\n\n"
+    "⏱ {now}"
+)
+
+DEBUG = bool(os.environ.get("SILVER_DEBUG"))  # print fetched values on every run
+
 BOT_TOKEN = os.environ["BOT_TOKEN"]
 CHAT_ID = os.environ["CHAT_ID"]
 
 # ---------------- HELPERS ----------------
-def send_telegram(text: str):
+async def send_telegram(session: aiohttp.ClientSession, text: str):
     if not BOT_TOKEN or not CHAT_ID or "PUT_YOUR" in BOT_TOKEN or "PUT_YOUR" in CHAT_ID:
         raise RuntimeError("BOT_TOKEN/CHAT_ID missing. Set them as environment variables or GitHub Secrets.")
 
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    r = requests.post(url, json={"chat_id": CHAT_ID, "text": text}, timeout=20)
-    r.raise_for_status()
+    payload = orjson.dumps({"chat_id": CHAT_ID, "text": text})
+    async with session.post(url, data=payload, headers={"Content-Type": "application/json"}) as r:
+        r.raise_for_status()
+
+
+async def last_prices(session: aiohttp.ClientSession, tickers: list[str]) -> dict[str, float]:
+    """
+    Reads regularMarketPrice for all tickers with one Yahoo quote request.
+    Tickers missing from the response fall back to the chart endpoint.
+    """
+    prices = {}
+    try:
+        async with session.get(
+            YAHOO_QUOTE_URL,
+            params={"symbols": ",".join(tickers)},
+            headers=YAHOO_HEADERS,
+        ) as r:
+            r.raise_for_status()
+            result = orjson.loads(await r.read())["quoteResponse"]["result"]
+        for q in result:
+            if q.get("regularMarketPrice"):
+                prices[q["symbol"]] = q["regularMarketPrice"]
+    except (aiohttp.ClientError, KeyError, ValueError):
+        pass
+
+    missing = [t for t in tickers if t not in prices]
+    if missing:
+        fallback = await asyncio.gather(*(last_price_chart(session, t) for t in missing))
+        prices.update(zip(missing, fallback))
 
+    return prices
 
-def last_price_yf(ticker: str) -> float:
-    t = yf.Ticker(ticker)
 
-    price = None
+# In-process memo for callers that run main() repeatedly (backtests, sweeps).
+# Entries are tagged with the wall-clock minute and ignored once it rolls over.
+_MEMO = {}
+
+
+def _memo_bucket() -> int:
+    return int(time.time() // 60)
+
+
+def memo_get(key: str):
+    hit = _MEMO.get(key)
+    if hit is not None and hit[0] == _memo_bucket():
+        return hit[1]
+    return None
+
+
+def memo_put(key: str, value):
+    _MEMO[key] = (_memo_bucket(), value)
+
+
+def _quote_cache_path(ticker: str) -> str:
+    name = hashlib.md5(ticker.encode()).hexdigest() + ".json"
+    return os.path.join(QUOTE_CACHE_DIR, name)
+
+
+def read_cached_price(ticker: str, ttl_sec: float):
+    """Returns the cached price if it is younger than ttl_sec, else None."""
     try:
-        price = t.fast_info.get("last_price")
-    except Exception:
+        with open(_quote_cache_path(ticker), encoding="utf-8") as f:
+            entry = json.load(f)
+        if time.time() - entry["ts"] < ttl_sec:
+            return float(entry["price"])  # validates what was read from disk
+    except (OSError, ValueError, KeyError, TypeError):
         pass
+    return None
 
-    if not price:
-        hist = t.history(period="1d", interval="1m")
-        if hist.empty:
-            raise RuntimeError(f"No data for {ticker}")
-        price = float(hist["Close"].iloc[-1])
 
-    return float(price)
+def write_cached_price(ticker: str, price: float):
+    """Best effort: a cache that cannot be written must not fail a run that has prices."""
+    try:
+        os.makedirs(QUOTE_CACHE_DIR, exist_ok=True)
+        with open(_quote_cache_path(ticker), "w", encoding="utf-8") as f:
+            json.dump({"ts": time.time(), "price": price}, f)
+    except OSError:
+        pass
 
 
-def mcx_silvermic_price_inr_per_kg_from_groww(url: str) -> float:
+async def cached_last_prices(session: aiohttp.ClientSession, tickers: list[str]) -> dict[str, float]:
+    """
+    Same as last_prices(), but serves tickers from the in-process memo or, with
+    SILVER_QUOTE_CACHE set, the disk cache while fresh.
+    Only stale tickers are fetched (still in one batch), then written back.
+    """
+    prices = {}
+    for t in tickers:
+        price = memo_get(t)
+        if price is None and QUOTE_CACHE:
+            price = read_cached_price(t, QUOTE_TTL_SEC)
+        if price is not None:
+            prices[t] = price
+
+    stale = [t for t in tickers if t not in prices]
+    if stale:
+        fresh = await last_prices(session, stale)
+        for t, price in fresh.items():
+            if QUOTE_CACHE:
+                write_cached_price(t, price)
+            memo_put(t, price)
+        prices.update(fresh)
+
+    return prices
+
+
+async def last_price_chart(session: aiohttp.ClientSession, ticker: str) -> float:
+    """Last non-null 1m close from Yahoo's chart endpoint (plain JSON, no pandas)."""
+    async with session.get(
+        YAHOO_CHART_URL.format(ticker=ticker),
+        params={"range": "1d", "interval": "1m"},
+        headers=YAHOO_HEADERS,
+    ) as r:
+        r.raise_for_status()
+        chart = orjson.loads(await r.read())["chart"]
+
+    result = chart.get("result")
+    if not result:
+        raise RuntimeError(f"No data for {ticker}")
+
+    # Bars can be all-null right after the open; meta still carries the last price
+    closes = result[0]["indicators"]["quote"][0].get("close") or []
+    price = next((c for c in reversed(closes) if c is not None), None)
+    if price is None:
+        price = result[0].get("meta", {}).get("regularMarketPrice")
+    if price is None:
+        raise RuntimeError(f"No data for {ticker}")
+
+    return price
+
+
+async def mcx_silvermic_price_inr_per_kg_from_groww(session: aiohttp.ClientSession, url: str) -> float:
     """
     Scrapes Groww public HTML futures page.
     Example snippet includes: "₹2,46,100.00"
     """
+    cached = memo_get(url)
+    if cached is not None:
+        return cached
+
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
     }
-    html = requests.get(url, headers=headers, timeout=25).text
-
-    # Prefer extracting the first main price shown near the header
+    # Stream the page and stop as soon as the header price shows up,
+    # instead of downloading the JS bundles and footer too.
     # On Groww page, the main price appears like: "₹2,46,100.00"
-    m = re.search(r"Silver Micro.*?₹\s*([\d,]+(?:\.\d+)?)", html, flags=re.DOTALL | re.IGNORECASE)
+    html = ""
+    m = None
+    async with session.get(url, headers=headers, timeout=SCRAPE_TIMEOUT) as r:
+        decoder = codecs.getincrementaldecoder(r.charset or "utf-8")(errors="replace")
+        async for chunk in r.content.iter_chunked(SCRAPE_CHUNK_SIZE):
+            html += decoder.decode(chunk)
+            m = _GROWW_RE.search(html)
+            # a number cut mid-chunk ("₹2,46,100." + "55") still matches a shorter prefix,
+            # so only stop once a character that cannot continue the number follows it
+            if m and m.end() < len(html) and html[m.end()] not in _NUMBER_CHARS:
+                break
+            if len(html) >= SCRAPE_MAX_CHARS:
+                break
+
     if not m:
-        # fallback: first ₹ amount in page
-        m = re.search(r"₹\s*([\d,]+(?:\.\d+)?)", html)
+        tree = LexborHTMLParser(html)
+        for selector in GROWW_PRICE_SELECTORS:
+            node = tree.css_first(selector)
+            if node is not None:
+                m = _RUPEE_RE.search(node.text())
+                if m:
+                    break
     if not m:
         raise RuntimeError("Could not parse MCX SILVERMIC price from Groww page (markup changed or blocked).")
 
-    price = float(m.group(1).replace(",", ""))
-
+    price = float(m.group(1).translate(_DELETE_COMMAS))
+    memo_put(url, price)
 
     return price
 
 
 # ---------------- MAIN ----------------
-def main():
-    a = last_price_yf(TICKER_A)
-    b = last_price_yf(TICKER_B)
-    diff_etf = a - b
-
-    mcx_per_kg = mcx_silvermic_price_inr_per_kg_from_groww(GROWW_MCX_URL)
-    mcx_per_gram = mcx_per_kg / 1000.0
-    diff_to_mcx = a - mcx_per_gram
-
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    print(
-        "A(GROWWSLVR):", a,
-        "B(SILVERIETF):", b,
-        "ETF diff:", diff_etf,
-        "MCX/kg:", mcx_per_kg,
-        "MCX/g:", mcx_per_gram,
-        "A-MCX diff:", diff_to_mcx
-    )
-
-    # Your final condition:
-    if abs(diff_etf) > THRESHOLD_ETF and abs(diff_to_mcx) < MAX_DIFF_TO_MCX:
-        msg = (
-            "🚨 Silver Alert\n\n"
-            f"GROWWSLVR: {a:.2f}\n"
-            f"SILVERIETF: {b:.2f}\n"
-            f"ETF Gap (A-B): {diff_etf:.2f} (>|{THRESHOLD_ETF}|)\n\n"
-            f"MCX SILVERMIC (₹/kg): {mcx_per_kg:.0f}\n"
-            f"MCX (₹/g): {mcx_per_gram:.2f}\n"
-            f"A - MCX Gap: {diff_to_mcx:.2f} (<|{MAX_DIFF_TO_MCX}|)\n\n"
-            f"⏱ {now}"
-        )
-        send_telegram(msg)
-    else:
-        print("No alert (conditions not met).")
+async def main():
+    # One pooled connector for Yahoo, Groww and Telegram; DNS answers are cached for the run
+    connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT) as session:
+        prices = await cached_last_prices(session, [TICKER_A, TICKER_B])
+        a = prices[TICKER_A]
+        b = prices[TICKER_B]
+        diff_etf = a - b
+
+        if abs(diff_etf) <= THRESHOLD_ETF:
+            if DEBUG:
+                print(
+                    "A(GROWWSLVR):", a,
+                    "B(SILVERIETF):", b,
+                    "ETF diff:", diff_etf
+                )
+            print("No alert: ETF gap too small.")
+            return
+
+        # Groww is only needed once the ETF gap makes an alert possible
+        mcx_per_kg = await mcx_silvermic_price_inr_per_kg_from_groww(session, GROWW_MCX_URL)
+        mcx_per_gram = mcx_per_kg / 1000.0
+        diff_to_mcx = a - mcx_per_gram
+
+        if DEBUG:
+            print(
+                "A(GROWWSLVR):", a,
+                "B(SILVERIETF):", b,
+                "ETF diff:", diff_etf,
+                "MCX/kg:", mcx_per_kg,
+                "MCX/g:", mcx_per_gram,
+                "A-MCX diff:", diff_to_mcx
+            )
+
+        # Your final condition:
+        if abs(diff_etf) > THRESHOLD_ETF and abs(diff_to_mcx) < MAX_DIFF_TO_MCX:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            msg = _ALERT_TMPL.format_map({
+                "a": a,
+                "b": b,
+                "diff_etf": diff_etf,
+                "mcx_per_kg": mcx_per_kg,
+                "mcx_per_gram": mcx_per_gram,
+                "diff_to_mcx": diff_to_mcx,
+                "now": now,
+            })
+            await send_telegram(session, msg)
+        else:
+            print("No alert (conditions not met).")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())